@@ -8,18 +8,38 @@ class Config:
     # Performance Settings
     USE_GPU = os.getenv('USE_GPU', 'auto')  # auto, true, false
     TORCH_DTYPE = os.getenv('TORCH_DTYPE', 'auto')  # auto, float16, float32
+    EMBEDDING_BATCH_SIZE = int(os.getenv('EMBEDDING_BATCH_SIZE', '0'))  # 0 = auto: 64 on CPU, 256 on GPU
+    EMBEDDING_BACKEND = os.getenv('EMBEDDING_BACKEND', 'torch')  # torch, onnx
+    EMBEDDING_ONNX_FILE = os.getenv('EMBEDDING_ONNX_FILE', '')  # e.g. onnx/model_qint8_avx512.onnx
+    INGEST_BATCH_SIZE = int(os.getenv('INGEST_BATCH_SIZE', '512'))  # Chunks embedded and indexed per step
+    EMBEDDING_CACHE = os.getenv('EMBEDDING_CACHE', 'true').lower() == 'true'  # Reuse chunk vectors across ingests
     
     # Answer Generation Settings
     MAX_ANSWER_LENGTH = int(os.getenv('MAX_ANSWER_LENGTH', '800'))
     MIN_CHUNK_LENGTH = int(os.getenv('MIN_CHUNK_LENGTH', '100'))
     TOP_K_CHUNKS = int(os.getenv('TOP_K_CHUNKS', '12'))
-    RELEVANCE_THRESHOLD = float(os.getenv('RELEVANCE_THRESHOLD', '1.5'))
+    RELEVANCE_THRESHOLD = float(os.getenv('RELEVANCE_THRESHOLD', '0.25'))  # Minimum cosine similarity
+    ANSWER_CACHE = os.getenv('ANSWER_CACHE', 'true').lower() == 'true'  # Reuse answers until re-ingestion
+    ANSWER_CACHE_SIZE = int(os.getenv('ANSWER_CACHE_SIZE', '1000'))  # Entries kept per cache table (least recently used evicted)
+    
+    # Vector Index Settings
+    HNSW_M = int(os.getenv('HNSW_M', '32'))
+    HNSW_EF_CONSTRUCTION = int(os.getenv('HNSW_EF_CONSTRUCTION', '200'))
+    HNSW_EF_SEARCH = int(os.getenv('HNSW_EF_SEARCH', '64'))
+    IVF_MIN_VECTORS = int(os.getenv('IVF_MIN_VECTORS', '100000'))  # Switch from HNSW to IVF at this size
+    IVF_NPROBE = int(os.getenv('IVF_NPROBE', '16'))
+    IVF_NLIST = int(os.getenv('IVF_NLIST', '0'))  # Inverted lists; 0 = 4*sqrt of the training sample
+    QUANTIZE_INDEX = os.getenv('QUANTIZE_INDEX', 'true').lower() == 'true'  # Compress stored vectors
+    PQ_M = int(os.getenv('PQ_M', '32'))  # Bytes per vector for the product-quantized IVF index
     
     # Ollama Settings
+    OLLAMA_URL = os.getenv('OLLAMA_URL', 'http://localhost:11434')
+    OLLAMA_MODELS_TTL = int(os.getenv('OLLAMA_MODELS_TTL', '300'))  # Seconds to reuse the chosen model
     OLLAMA_TEMPERATURE = float(os.getenv('OLLAMA_TEMPERATURE', '0.2'))
     OLLAMA_TOP_P = float(os.getenv('OLLAMA_TOP_P', '0.8'))
     OLLAMA_MAX_TOKENS = int(os.getenv('OLLAMA_MAX_TOKENS', '800'))
     OLLAMA_TIMEOUT = int(os.getenv('OLLAMA_TIMEOUT', '45'))
+    OLLAMA_KEEP_ALIVE = os.getenv('OLLAMA_KEEP_ALIVE', '30m')  # How long Ollama keeps the model loaded
     
     # Model Priority (1=highest priority)
     # 1. Ollama with preferred models (llama3.2:1b, mistral:7b, mistral:latest)
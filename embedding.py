@@ -0,0 +1,49 @@
+import os
+
+# Use every core for embedding, index building and search; some containers
+# default to one thread. The environment only takes effect if this module is
+# imported before numpy, faiss or torch; the explicit thread counts set below
+# also cover scripts that import faiss first.
+os.environ.setdefault('OMP_NUM_THREADS', str(os.cpu_count() or 1))
+os.environ.setdefault('MKL_NUM_THREADS', str(os.cpu_count() or 1))
+
+import faiss
+import sys
+import torch
+from functools import lru_cache
+from sentence_transformers import SentenceTransformer
+
+from config import Config
+
+NUM_THREADS = int(os.environ['OMP_NUM_THREADS'])
+torch.set_num_threads(NUM_THREADS)
+torch.set_num_interop_threads(2)
+faiss.omp_set_num_threads(NUM_THREADS)
+
+# Identifies the configured model variant in the embedding cache keys
+MODEL_TAG = f"{Config.EMBEDDING_BACKEND}:{Config.EMBEDDING_ONNX_FILE}"
+
+def embedding_device():
+    """Resolve Config.USE_GPU to the device the embedding model runs on"""
+    if Config.USE_GPU == 'auto':
+        return 'cuda' if torch.cuda.is_available() else 'cpu'
+    return 'cuda' if Config.USE_GPU == 'true' else 'cpu'
+
+@lru_cache(maxsize=1)
+def load_embedder():
+    """Load the embedding model once per process with the configured backend, device and precision"""
+    device = embedding_device()
+    if Config.EMBEDDING_BACKEND == 'onnx':
+        # ONNX Runtime skips the PyTorch wrapper; needs optimum[onnxruntime]
+        model_kwargs = {"file_name": Config.EMBEDDING_ONNX_FILE} if Config.EMBEDDING_ONNX_FILE else None
+        try:
+            return SentenceTransformer('all-MiniLM-L6-v2', device=device, backend='onnx', model_kwargs=model_kwargs)
+        except Exception as e:
+            # stderr: answer_question.py keeps stdout for its JSON result
+            print(f"⚠️ ONNX backend unavailable, using PyTorch: {e}", file=sys.stderr)
+
+    embedder = SentenceTransformer('all-MiniLM-L6-v2', device=device)
+    # Half precision doubles GPU throughput; MiniLM embeddings are stable in fp16
+    if embedder.device.type == 'cuda' and Config.TORCH_DTYPE != 'float32':
+        embedder.half()
+    return embedder
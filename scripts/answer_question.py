@@ -3,161 +3,340 @@
 import sys
 import json
 import os
-import pickle
-import faiss
-import numpy as np
-from sentence_transformers import SentenceTransformer
-import re
-
+import hashlib
+import sqlite3
 from pathlib import Path
-import sys
 
-# Add the project root to the path to import config
-sys.path.append(str(Path(__file__).parent.parent))
+# Add the project root to the path to import config and the shared embedding setup
+PROJECT_ROOT = Path(__file__).parent.parent
+sys.path.append(str(PROJECT_ROOT))
 from config import Config
+from embedding import MODEL_TAG, load_embedder
+
+import faiss
+import numpy as np
+import re
+import time
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
 
 # Ollama imports
 try:
     import requests
+    from requests.adapters import HTTPAdapter
     OLLAMA_AVAILABLE = True
 except ImportError:
     OLLAMA_AVAILABLE = False
     print("Requests library not available. Install with: pip install requests")
 
+# orjson serializes the large prompt payload and parses stream fragments in C
+try:
+    import orjson
+    _json_dumps = orjson.dumps
+    _json_loads = orjson.loads
+except ImportError:
+    def _json_dumps(obj):
+        return json.dumps(obj).encode('utf-8')
+    _json_loads = json.loads
+
+# Ollama parses a string keep_alive as a duration ("30m") and rejects a bare
+# "-1", so plain numbers of seconds are sent as integers
+_KEEP_ALIVE = Config.OLLAMA_KEEP_ALIVE
+if _KEEP_ALIVE.lstrip('-').isdigit():
+    _KEEP_ALIVE = int(_KEEP_ALIVE)
+
+# One keep-alive connection pool for every Ollama call in this process
+_OLLAMA_POOL_SIZE = 4
+if OLLAMA_AVAILABLE:
+    _SESSION = requests.Session()
+    _SESSION.mount('http://', HTTPAdapter(pool_connections=_OLLAMA_POOL_SIZE, pool_maxsize=_OLLAMA_POOL_SIZE, max_retries=0))
+    _SESSION.headers.update({'Accept-Encoding': 'gzip'})
+
+# Last model pick (None when no model was usable) and when it was made
+_ollama_model = None
+_ollama_model_ts = None
+# A failed pick is reused for this many seconds before Ollama is probed again
+_OLLAMA_RETRY_TTL = 15
+
+# Text normalization patterns, compiled once
+_WS = re.compile(r'\s+')
+_PUNCT = re.compile(r'[.!?]{2,}')
+_WORD = re.compile(r'\b\w+\b')
+_QUOTE_TABLE = str.maketrans({
+    '\u201c': '"', '\u201d': '"',
+    '\u2018': "'", '\u2019': "'",
+    '\u2013': '-', '\u2014': '--',
+})
+
+class ChunkStore:
+    """Read-only access to chunk texts packed into texts.bin by the ingest script"""
+    
+    def __init__(self, texts_path, offsets_path):
+        # offsets[i]:offsets[i + 1] is the byte range of chunk i
+        self.offsets = np.load(offsets_path, mmap_mode='r')
+        self.texts_file = open(texts_path, 'rb')
+    
+    def __len__(self):
+        return len(self.offsets) - 1
+    
+    def __getitem__(self, i):
+        start, end = int(self.offsets[i]), int(self.offsets[i + 1])
+        self.texts_file.seek(start)
+        return self.texts_file.read(end - start).decode('utf-8')
+
+@lru_cache(maxsize=1)
+def _get_cache():
+    """Open the on-disk answer and question-embedding cache, creating it on first use"""
+    cache_path = PROJECT_ROOT / "embeddings/answer_cache/cache.sqlite"
+    cache_path.parent.mkdir(parents=True, exist_ok=True)
+    
+    cache = sqlite3.connect(cache_path, timeout=5)
+    # used holds the last access time, so the least recently used entries are evicted first
+    cache.execute("CREATE TABLE IF NOT EXISTS answers (key TEXT PRIMARY KEY, answer TEXT, used REAL)")
+    cache.execute("CREATE INDEX IF NOT EXISTS answers_used ON answers (used)")
+    cache.execute("CREATE TABLE IF NOT EXISTS question_embeddings (key TEXT PRIMARY KEY, vec BLOB, used REAL)")
+    cache.execute("CREATE INDEX IF NOT EXISTS question_embeddings_used ON question_embeddings (used)")
+    return cache
+
+def _evict(cache, table):
+    """Trim a cache table to the ANSWER_CACHE_SIZE most recently used entries"""
+    cache.execute(
+        f"DELETE FROM {table} WHERE key IN (SELECT key FROM {table} ORDER BY used DESC LIMIT -1 OFFSET ?)",
+        (Config.ANSWER_CACHE_SIZE,),
+    )
+
+def _index_mtime():
+    """Modification time of index.faiss, which the ingest script replaces last"""
+    return os.path.getmtime(PROJECT_ROOT / "embeddings/faiss_index/index.faiss")
+
+def _answer_cache_key(question, model):
+    """Key answers by question, Ollama model and index version so re-ingesting invalidates them"""
+    index_mtime = _index_mtime()
+    return hashlib.sha256(f"{question}|{model}|{index_mtime}".encode('utf-8')).hexdigest()
+
+def get_cached_answer(question, model):
+    """Return the answer model gave for question against the current index, or None"""
+    if not Config.ANSWER_CACHE or model is None:
+        return None
+    try:
+        key = _answer_cache_key(question, model)
+        with _get_cache() as cache:
+            row = cache.execute("SELECT answer FROM answers WHERE key = ?", (key,)).fetchone()
+            if row:
+                cache.execute("UPDATE answers SET used = ? WHERE key = ?", (time.time(), key))
+    except (OSError, sqlite3.Error):
+        return None
+    return row[0] if row else None
+
+def cache_answer(question, model, answer):
+    """Store an answer; cache failures never affect the answer itself"""
+    if not Config.ANSWER_CACHE:
+        return
+    try:
+        with _get_cache() as cache:
+            cache.execute("INSERT OR REPLACE INTO answers VALUES (?, ?, ?)",
+                          (_answer_cache_key(question, model), answer, time.time()))
+            _evict(cache, "answers")
+    except (OSError, sqlite3.Error) as e:
+        print(f"⚠️ Could not cache answer: {e}", file=sys.stderr)
+
+def embed_questions(questions):
+    """Embed questions as unit-length float32 rows, reusing cached vectors for repeats"""
+    # Vectors depend on the embedding backend, as in the ingest cache
+    keys = [hashlib.sha256(f"{MODEL_TAG}\0{question}".encode('utf-8')).hexdigest() for question in questions]
+    cached = {}
+    if Config.ANSWER_CACHE:
+        try:
+            placeholders = ",".join("?" * len(keys))
+            with _get_cache() as cache:
+                rows = cache.execute(f"SELECT key, vec FROM question_embeddings WHERE key IN ({placeholders})", keys).fetchall()
+                cached = {key: np.frombuffer(vec, dtype=np.float32) for key, vec in rows}
+                if cached:
+                    cache.executemany("UPDATE question_embeddings SET used = ? WHERE key = ?",
+                                      [(time.time(), key) for key in cached])
+        except (OSError, sqlite3.Error):
+            pass
+    
+    misses = [i for i, key in enumerate(keys) if key not in cached]
+    if misses:
+        # Embed the questions as unit-length float32 rows; no copy when already in that form
+        model = load_embedder()
+        embeddings = model.encode([questions[i] for i in misses], batch_size=32, convert_to_numpy=True, normalize_embeddings=True)
+        embeddings = embeddings.astype(np.float32, copy=False)
+        for i, embedding in zip(misses, embeddings):
+            cached[keys[i]] = embedding
+        
+        if Config.ANSWER_CACHE:
+            try:
+                with _get_cache() as cache:
+                    cache.executemany(
+                        "INSERT OR REPLACE INTO question_embeddings VALUES (?, ?, ?)",
+                        [(keys[i], embedding.tobytes(), time.time()) for i, embedding in zip(misses, embeddings)],
+                    )
+                    _evict(cache, "question_embeddings")
+            except (OSError, sqlite3.Error) as e:
+                print(f"⚠️ Could not cache question embeddings: {e}", file=sys.stderr)
+    
+    return np.ascontiguousarray(np.stack([cached[key] for key in keys]))
+
 def load_embeddings():
     """Load the FAISS index and chunks"""
     # Make sure to look for embeddings relative to the project root
-    project_root = Path(__file__).parent.parent
-    embeddings_dir = project_root / "embeddings/faiss_index"
+    embeddings_dir = PROJECT_ROOT / "embeddings/faiss_index"
     
     if not embeddings_dir.exists():
         raise Exception("No embeddings found. Please upload and process documents first.")
     
     # Load FAISS index
     index_path = embeddings_dir / "index.faiss"
-    chunks_path = embeddings_dir / "chunks.pkl"
+    texts_path = embeddings_dir / "texts.bin"
+    offsets_path = embeddings_dir / "offsets.npy"
     
-    if not index_path.exists() or not chunks_path.exists():
+    if not index_path.exists() or not texts_path.exists() or not offsets_path.exists():
         raise Exception("Embeddings are incomplete. Please re-process your documents.")
     
-    index = faiss.read_index(str(index_path))
+    # Only the inverted lists of an IVF index are memory-mapped, so a search
+    # reads just the lists it probes; HNSW indexes are still loaded in full
+    try:
+        index = faiss.read_index(str(index_path), faiss.IO_FLAG_MMAP | faiss.IO_FLAG_READ_ONLY)
+    except RuntimeError:
+        # Fall back to a plain load if this faiss build rejects the flags
+        index = faiss.read_index(str(index_path))
+    
+    # Set search-time accuracy knobs for approximate indexes
+    if hasattr(index, 'hnsw'):
+        index.hnsw.efSearch = max(Config.HNSW_EF_SEARCH, Config.TOP_K_CHUNKS)
+    elif hasattr(index, 'nprobe'):
+        index.nprobe = Config.IVF_NPROBE
     
-    with open(chunks_path, 'rb') as f:
-        chunks = pickle.load(f)
+    chunks = ChunkStore(texts_path, offsets_path)
     
     return index, chunks
 
+def pick_ollama_model(ttl=None):
+    """Choose the Ollama model to use, reusing the last choice for ttl seconds.
+    
+    Returns None when Ollama is not responding or no supported model is installed;
+    that outcome is reused for a shorter time so callers do not each re-probe Ollama.
+    """
+    global _ollama_model, _ollama_model_ts
+    if ttl is None:
+        ttl = Config.OLLAMA_MODELS_TTL
+    if _ollama_model is None:
+        ttl = min(ttl, _OLLAMA_RETRY_TTL)
+    
+    if _ollama_model_ts is not None and time.monotonic() - _ollama_model_ts < ttl:
+        return _ollama_model
+    
+    try:
+        _ollama_model = _find_ollama_model()
+    except Exception as e:
+        print(f"❌ Failed to connect to Ollama: {e}", file=sys.stderr)
+        _ollama_model = None
+    _ollama_model_ts = time.monotonic()
+    return _ollama_model
+
+def _find_ollama_model():
+    """Ask Ollama for its installed models and return the preferred one, or None"""
+    response = _SESSION.get(f"{Config.OLLAMA_URL}/api/tags", timeout=5)
+    if response.status_code != 200:
+        print("❌ Ollama is not responding", file=sys.stderr)
+        return None
+    
+    models = _json_loads(response.content).get("models", [])
+    model_name = None
+    
+    # Prefer faster, smaller models for better performance
+    for priority_model in Config.PREFERRED_MODELS:
+        for model in models:
+            if priority_model in model.get("name", "").lower():
+                model_name = model["name"]
+                break
+        if model_name:
+            break
+    
+    # Fallback to any mistral model if priority models not available
+    if not model_name:
+        mistral_models = [m for m in models if "mistral" in m.get("name", "").lower()]
+        if mistral_models:
+            model_name = mistral_models[0]["name"]
+    
+    if not model_name:
+        print("❌ Ollama is running but none of the preferred models are installed", file=sys.stderr)
+        return None
+    
+    print(f"✅ Found Ollama with model: {model_name}", file=sys.stderr)
+    return model_name
+
 def check_ollama_availability():
-    """Check if Ollama is running and Mistral model is available"""
+    """Check if Ollama is running and a preferred model is available"""
     if not OLLAMA_AVAILABLE:
         return False
+    return pick_ollama_model() is not None
+
+def warm_up_ollama():
+    """Load the chosen model into Ollama ahead of the first question"""
+    if not check_ollama_availability():
+        return
     
     try:
-        # Check if Ollama is running
-        response = requests.get("http://localhost:11434/api/tags", timeout=5)
-        if response.status_code == 200:
-            models = response.json().get("models", [])
-            # Check if Mistral model is available
-            mistral_models = [m for m in models if "mistral" in m.get("name", "").lower()]
-            if mistral_models:
-                print(f"✅ Found Ollama with Mistral models: {[m['name'] for m in mistral_models]}", file=sys.stderr)
-                return True
-            else:
-                print("❌ Ollama is running but no Mistral models found", file=sys.stderr)
-                return False
-        else:
-            print("❌ Ollama is not responding", file=sys.stderr)
-            return False
+        # An empty prompt only loads the model; keep_alive pins it in memory
+        _SESSION.post(f"{Config.OLLAMA_URL}/api/generate",
+                      json={"model": pick_ollama_model(), "prompt": "", "keep_alive": _KEEP_ALIVE},
+                      timeout=Config.OLLAMA_TIMEOUT)
     except Exception as e:
-        print(f"❌ Failed to connect to Ollama: {e}", file=sys.stderr)
-        return False
+        print(f"❌ Failed to warm up Ollama: {e}", file=sys.stderr)
 
 def preprocess_text(text):
     """Clean and normalize text for better processing"""
     # Remove extra whitespace and normalize
-    text = re.sub(r'\s+', ' ', text.strip())
+    text = _WS.sub(' ', text.strip())
     
-    # Replace unicode quotes and apostrophes
-    text = text.replace('\u201c', '"').replace('\u201d', '"')
-    text = text.replace('\u2018', "'").replace('\u2019', "'")
-    text = text.replace('\u2013', '-').replace('\u2014', '--')
+    # Replace unicode quotes, apostrophes and dashes in a single pass
+    text = text.translate(_QUOTE_TABLE)
     
     # Remove excessive punctuation
-    text = re.sub(r'[.!?]{2,}', '.', text)
+    text = _PUNCT.sub('.', text)
     
     return text
 
-def get_relevant_context(question, index, chunks, top_k=None):
-    """Retrieve relevant context from embeddings with improved relevance scoring"""
+def get_relevant_contexts(questions, index, chunks, top_k=None):
+    """Retrieve relevant context for several questions with one encode and one search call"""
     if top_k is None:
         top_k = Config.TOP_K_CHUNKS
     
-    # Load the same model used for creating embeddings
-    model = SentenceTransformer('all-MiniLM-L6-v2')
-    
-    # Preprocess the question
-    question = preprocess_text(question)
-    
-    # Embed the question
-    question_embedding = model.encode([question])
+    # Preprocess and embed the questions
+    questions = [preprocess_text(question) for question in questions]
+    question_embeddings = embed_questions(questions)
     
     # Search for similar chunks
-    distances, indices = index.search(question_embedding.astype('float32'), top_k)
-    
-    # Get relevant chunks with distance scores
-    relevant_chunks = []
-    for i, distance in zip(indices[0], distances[0]):
-        if i < len(chunks):
-            chunk = chunks[i]
-            # Handle both Document objects and plain strings
-            if hasattr(chunk, 'page_content'):
-                content = chunk.page_content
-            elif hasattr(chunk, 'content'):
-                content = chunk.content
-            else:
-                content = str(chunk)
-            
-            # Preprocess the chunk content
-            content = preprocess_text(content)
-            
-            # Only include chunks with reasonable relevance
-            if distance < Config.RELEVANCE_THRESHOLD:
-                relevant_chunks.append((content, distance))
-    
-    # Sort by relevance (lower distance = more relevant)
-    relevant_chunks.sort(key=lambda x: x[1])
+    scores, indices = index.search(question_embeddings, top_k)
+    
+    contexts = []
+    for row_indices, row_scores in zip(indices, scores):
+        # Get relevant chunks with similarity scores
+        relevant_chunks = []
+        for i, score in zip(row_indices, row_scores):
+            # Only include chunks with reasonable relevance; cleaning happens in generate_answer
+            if 0 <= i < len(chunks) and score > Config.RELEVANCE_THRESHOLD:
+                relevant_chunks.append((chunks[i], score))
+        
+        # Sort by relevance (higher similarity = more relevant)
+        relevant_chunks.sort(key=lambda x: x[1], reverse=True)
+        
+        # Keep only the content, not the scores
+        contexts.append([chunk for chunk, _ in relevant_chunks])
     
-    # Return only the content, not the distances
-    return [chunk for chunk, _ in relevant_chunks]
+    return contexts
+
+def get_relevant_context(question, index, chunks, top_k=None):
+    """Retrieve relevant context from embeddings with improved relevance scoring"""
+    return get_relevant_contexts([question], index, chunks, top_k)[0]
 
 def generate_ollama_answer(question, context):
     """Generate answer using Ollama with improved prompt engineering"""
     try:
-        # Get the first available Mistral model
-        response = requests.get("http://localhost:11434/api/tags", timeout=5)
-        if response.status_code != 200:
-            return None
-            
-        models = response.json().get("models", [])
-        
-        # Prefer faster, smaller models for better performance
-        model_priorities = ["llama3.2:1b", "mistral:7b", "mistral:latest"]
-        model_name = None
-        
-        for priority_model in model_priorities:
-            for model in models:
-                if priority_model in model.get("name", "").lower():
-                    model_name = model["name"]
-                    break
-            if model_name:
-                break
-        
-        # Fallback to any mistral model if priority models not available
-        if not model_name:
-            mistral_models = [m for m in models if "mistral" in m.get("name", "").lower()]
-            if mistral_models:
-                model_name = mistral_models[0]["name"]
-        
+        model_name = pick_ollama_model()
         if not model_name:
             return None
         
@@ -183,7 +362,8 @@ Please provide a clear, accurate, and well-formed answer based on the context ab
         payload = {
             "model": model_name,
             "prompt": prompt,
-            "stream": False,
+            "stream": True,
+            "keep_alive": _KEEP_ALIVE,  # Keep the model loaded between questions
             "options": {
                 "temperature": Config.OLLAMA_TEMPERATURE,
                 "top_p": Config.OLLAMA_TOP_P,
@@ -192,22 +372,42 @@ Please provide a clear, accurate, and well-formed answer based on the context ab
             }
         }
         
-        response = requests.post("http://localhost:11434/api/generate", 
-                               json=payload, 
-                               timeout=Config.OLLAMA_TIMEOUT)
+        # The request timeout only bounds each socket read once streaming, so
+        # the whole generation gets its own deadline
+        deadline = time.monotonic() + Config.OLLAMA_TIMEOUT
         
-        if response.status_code == 200:
-            result = response.json()
-            answer = result.get("response", "").strip()
+        # Stream tokens as they are generated; each line is one JSON fragment
+        with _SESSION.post(f"{Config.OLLAMA_URL}/api/generate", 
+                           data=_json_dumps(payload), 
+                           headers={'Content-Type': 'application/json'},
+                           stream=True,
+                           timeout=Config.OLLAMA_TIMEOUT) as response:
+            if response.status_code != 200:
+                print(f"❌ Ollama API error: {response.status_code}", file=sys.stderr)
+                return None
             
-            # Post-process the answer for better formatting
-            answer = post_process_answer(answer)
-            
-            print(f"✅ Generated answer using Ollama ({model_name})", file=sys.stderr)
-            return answer
-        else:
-            print(f"❌ Ollama API error: {response.status_code}", file=sys.stderr)
-            return None
+            parts = []
+            for line in response.iter_lines():
+                if not line:
+                    continue
+                fragment = _json_loads(line)
+                if "error" in fragment:
+                    print(f"❌ Ollama API error: {fragment['error']}", file=sys.stderr)
+                    return None
+                parts.append(fragment.get("response", ""))
+                if fragment.get("done"):
+                    break
+                if time.monotonic() > deadline:
+                    print(f"❌ Ollama generation exceeded {Config.OLLAMA_TIMEOUT}s", file=sys.stderr)
+                    return None
+        
+        answer = "".join(parts).strip()
+        
+        # Post-process the answer for better formatting
+        answer = post_process_answer(answer)
+        
+        print(f"✅ Generated answer using Ollama ({model_name})", file=sys.stderr)
+        return answer
             
     except Exception as e:
         print(f"❌ Error generating with Ollama: {e}", file=sys.stderr)
@@ -216,7 +416,7 @@ Please provide a clear, accurate, and well-formed answer based on the context ab
 def post_process_answer(answer):
     """Clean and format the answer for better presentation"""
     # Remove excessive whitespace
-    answer = re.sub(r'\s+', ' ', answer.strip())
+    answer = _WS.sub(' ', answer.strip())
     
     # Ensure proper sentence endings
     if answer and not answer.endswith(('.', '!', '?')):
@@ -238,36 +438,45 @@ def post_process_answer(answer):
     
     return answer
 
-def generate_improved_answer(question, cleaned_chunks):
-    """Generate an improved answer by analyzing and combining relevant information"""
-    if not cleaned_chunks:
+def _prep_chunk(text):
+    """Clean a chunk and collect its lowercase word set in one place"""
+    cleaned = preprocess_text(text)
+    return cleaned, frozenset(_WORD.findall(cleaned.lower()))
+
+def generate_improved_answer(question, prepped_chunks):
+    """Generate an improved answer by analyzing and combining relevant information.
+    
+    prepped_chunks holds (clean_text, word_set) pairs as built by _prep_chunk.
+    """
+    if not prepped_chunks:
         return "I couldn't find any relevant information in the uploaded documents to answer your question."
     
     # Extract key terms from the question
     question_lower = question.lower()
-    question_words = set(re.findall(r'\b\w+\b', question_lower))
+    question_tokens = _WORD.findall(question_lower)
     
     # Remove common stop words
     stop_words = {'what', 'how', 'why', 'when', 'where', 'is', 'are', 'the', 'a', 'an', 'and', 'or', 'but', 'in', 'on', 'at', 'to', 'for', 'of', 'with', 'by'}
-    question_words = question_words - stop_words
+    question_words = set(question_tokens) - stop_words
+    
+    # Adjacent key-term pairs from the question, in their original order
+    question_bigrams = [
+        f"{first} {second}"
+        for first, second in zip(question_tokens, question_tokens[1:])
+        if first not in stop_words and second not in stop_words
+    ]
     
     # Score and rank chunks based on relevance
     scored_chunks = []
-    for chunk in cleaned_chunks:
+    for chunk, chunk_words in prepped_chunks:
         chunk_lower = chunk.lower()
-        chunk_words = set(re.findall(r'\b\w+\b', chunk_lower))
         
         # Calculate relevance score
         word_overlap = len(question_words.intersection(chunk_words))
         phrase_matches = sum(1 for word in question_words if word in chunk_lower)
         
-        # Bonus for exact phrase matches
-        exact_phrases = 0
-        for i in range(len(question_words)):
-            for j in range(i+1, len(question_words)+1):
-                phrase = ' '.join(list(question_words)[i:j])
-                if phrase in chunk_lower:
-                    exact_phrases += 1
+        # Bonus for exact phrase matches (single key terms and key-term pairs)
+        exact_phrases = phrase_matches + sum(1 for bigram in question_bigrams if bigram in chunk_lower)
         
         total_score = word_overlap + phrase_matches * 0.5 + exact_phrases * 2
         scored_chunks.append((total_score, chunk))
@@ -285,7 +494,7 @@ def generate_improved_answer(question, cleaned_chunks):
     combined_text = " ".join(relevant_chunks)
     
     # Clean up the combined text
-    combined_text = re.sub(r'\s+', ' ', combined_text)
+    combined_text = _WS.sub(' ', combined_text)
     
     # Limit length while preserving sentence structure
     max_length = Config.MAX_ANSWER_LENGTH
@@ -309,66 +518,137 @@ def generate_improved_answer(question, cleaned_chunks):
 
 def generate_answer(question, context_chunks):
     """Generate answer using Ollama or improved local model"""
+    return _generate_answer(question, context_chunks)[0]
+
+def _generate_answer(question, context_chunks):
+    """Generate an answer, returning (answer, Ollama model name or None for the fallback)"""
     
-    # Clean and combine context chunks
-    cleaned_chunks = []
-    for chunk in context_chunks:
-        # Clean up the text
-        clean_text = preprocess_text(chunk)
-        if len(clean_text) > Config.MIN_CHUNK_LENGTH:  # Only include substantial chunks
-            cleaned_chunks.append(clean_text)
+    # Clean and tokenize each context chunk in a single pass
+    prepped_chunks = [prepped for prepped in map(_prep_chunk, context_chunks)
+                      if len(prepped[0]) > Config.MIN_CHUNK_LENGTH]  # Only include substantial chunks
     
-    if not cleaned_chunks:
-        return "I couldn't find sufficient relevant information in the uploaded documents to answer your question."
+    if not prepped_chunks:
+        return "I couldn't find sufficient relevant information in the uploaded documents to answer your question.", None
     
-    context = "\n\n".join(cleaned_chunks)
+    context = "\n\n".join(text for text, _ in prepped_chunks)
     
     # Try Ollama first, then fallback to extraction-based answer
     
     # 1. Try Ollama first (if available)
     try:
         if check_ollama_availability():
+            model_name = pick_ollama_model()
             answer = generate_ollama_answer(question, context)
             if answer:
-                return answer
+                return answer, model_name
             print("Ollama failed, using fallback...", file=sys.stderr)
     except Exception as e:
         print(f"Ollama error: {e}", file=sys.stderr)
     
     # 2. Fallback to improved extraction-based answer
-    return generate_improved_answer(question, cleaned_chunks)
+    return generate_improved_answer(question, prepped_chunks), None
 
 def generate_simple_answer(question, context_chunks):
     """Generate a simple answer by finding relevant sentences - kept for backward compatibility"""
-    return generate_improved_answer(question, context_chunks)
+    return generate_improved_answer(question, [_prep_chunk(chunk) for chunk in context_chunks])
 
-def main():
-    if len(sys.argv) != 2:
-        print(json.dumps({"error": "Question argument required"}))
-        sys.exit(1)
+def _answering_model():
+    """Ollama model cached answers are looked up for, or None when there is nothing to look up"""
+    if not Config.ANSWER_CACHE or not check_ollama_availability():
+        return None
+    return pick_ollama_model()
+
+def _answer_uncached(questions, index, chunks):
+    """Run retrieval and generation for questions without consulting the cache.
     
-    question = sys.argv[1]
+    Returns one (answer, Ollama model name or None) pair per question.
+    """
+    contexts = get_relevant_contexts(questions, index, chunks)
     
-    try:
-        # Load embeddings
-        index, chunks = load_embeddings()
-        
-        # Get relevant context
-        relevant_chunks = get_relevant_context(question, index, chunks)
-        
+    def answer(question, relevant_chunks):
         if not relevant_chunks:
-            answer = "No relevant information found in the uploaded documents."
-        else:
-            # Generate answer
-            answer = generate_answer(question, relevant_chunks)
-        
-        # Return result as JSON
-        result = {"answer": answer}
-        print(json.dumps(result))
+            return "No relevant information found in the uploaded documents.", None
         
+        # Generate answer
+        return _generate_answer(question, relevant_chunks)
+    
+    if len(questions) == 1:
+        return [answer(questions[0], contexts[0])]
+    
+    # Ollama requests share the pooled session, so they can run side by side
+    with ThreadPoolExecutor(max_workers=_OLLAMA_POOL_SIZE) as executor:
+        return list(executor.map(answer, questions, contexts))
+
+@lru_cache(maxsize=1)
+def _get_embeddings():
+    """Load the index and chunks once per process"""
+    return load_embeddings()
+
+def answer_question(question):
+    """Answer one question, returning {"answer": ...} or {"error": ...}"""
+    return answer_question_batch([question])[0]
+
+def answer_question_batch(questions):
+    """Answer several questions with one embedding pass and one index search, one result dict each"""
+    try:
+        # Repeated questions skip loading the model and index entirely
+        model = _answering_model()
+        answers = [get_cached_answer(question, model) for question in questions]
+        misses = [i for i, answer in enumerate(answers) if answer is None]
+        if misses:
+            index, chunks = _get_embeddings()
+            missed_questions = [questions[i] for i in misses]
+            for i, (answer, answer_model) in zip(misses, _answer_uncached(missed_questions, index, chunks)):
+                answers[i] = answer
+                # Fallback answers are not cached, so the question reaches Ollama once it is back
+                if answer_model is not None:
+                    cache_answer(questions[i], answer_model, answer)
+        return [{"answer": answer} for answer in answers]
     except Exception as e:
-        error_result = {"error": str(e)}
-        print(json.dumps(error_result))
+        return [{"error": str(e)} for _ in questions]
+
+def serve():
+    """Answer one question per stdin line, keeping the model and index loaded between questions"""
+    loaded_mtime = None
+    try:
+        _get_embeddings()
+        loaded_mtime = _index_mtime()
+    except Exception as e:
+        # Keep serving: questions report the error until documents are ingested
+        print(f"⚠️ {e}", file=sys.stderr)
+    load_embedder()
+    warm_up_ollama()
+    print("✅ Ready for questions on stdin", file=sys.stderr)
+    
+    for line in sys.stdin:
+        question = line.strip()
+        if not question:
+            continue
+        
+        # Reload after a re-ingest instead of searching the replaced store
+        try:
+            index_mtime = _index_mtime()
+        except OSError:
+            index_mtime = None
+        if index_mtime != loaded_mtime:
+            _get_embeddings.cache_clear()
+            loaded_mtime = index_mtime
+        
+        print(json.dumps(answer_question(question)), flush=True)
+
+def main():
+    if len(sys.argv) == 2 and sys.argv[1] == "--serve":
+        serve()
+        return
+    
+    if len(sys.argv) != 2:
+        print(json.dumps({"error": "Question argument required"}))
+        sys.exit(1)
+    
+    # Return result as JSON
+    result = answer_question(sys.argv[1])
+    print(json.dumps(result))
+    if "error" in result:
         sys.exit(1)
 
 if __name__ == "__main__":
@@ -1,123 +1,267 @@
-from langchain_community.document_loaders import PyMuPDFLoader
-from langchain.text_splitter import RecursiveCharacterTextSplitter
-from sentence_transformers import SentenceTransformer
-import faiss
-import os
-import pickle
-import re
 import sys
 from pathlib import Path
 
 # Add the project root to the path to import config
 sys.path.append(str(Path(__file__).parent.parent))
 from config import Config
+from parse_documents import parse_tasks, process_file
+
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+import faiss
+import hashlib
+import itertools
+import math
+import numpy as np
+import os
+import sqlite3
 
-# Load and split all PDFs and text files
+# Load and split all PDFs and text files, yielding (text, source) pairs as each file is processed
 def load_and_chunk(folder_path):
-    all_docs = []
-    
-    # Improved text splitter with better parameters for accuracy
-    splitter = RecursiveCharacterTextSplitter(
-        chunk_size=800,  # Increased chunk size for better context
-        chunk_overlap=150,  # Increased overlap for better continuity
-        length_function=len,
-        separators=["\n\n", "\n", ". ", "! ", "? ", " ", ""]  # Better separators
-    )
+    chunk_count = 0
     
     # Create folder if it doesn't exist
     os.makedirs(folder_path, exist_ok=True)
     
-    for filename in os.listdir(folder_path):
-        if filename.endswith((".pdf", ".txt", ".doc", ".docx")):
-            path = os.path.join(folder_path, filename)
-            print(f"Processing: {filename}")
-            
-            if filename.endswith(".pdf"):
-                loader = PyMuPDFLoader(path)
-                docs = loader.load()
-                
-                # Preprocess documents for better chunking
-                for doc in docs:
-                    # Clean the content
-                    doc.page_content = preprocess_content(doc.page_content)
-                
-                chunks = splitter.split_documents(docs)
-                all_docs.extend(chunks)
-            elif filename.endswith(".txt"):
-                # Handle text files
-                with open(path, 'r', encoding='utf-8') as f:
-                    content = f.read()
-                
-                # Preprocess content
-                content = preprocess_content(content)
+    filenames = [f for f in os.listdir(folder_path) if f.endswith((".pdf", ".txt", ".doc", ".docx"))]
+    paths = [os.path.join(folder_path, filename) for filename in filenames]
+    
+    # PDF parsing is CPU-bound, so files are parsed in parallel worker processes.
+    # Results are taken in completion order so one large file does not hold back
+    # the rest, and only a few files are in flight at once so parsed chunks cannot
+    # pile up in memory while embedding catches up.
+    workers = min(os.cpu_count() or 1, 6)
+    remaining = parse_tasks(paths)
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        in_flight = {executor.submit(process_file, *task) for task in itertools.islice(remaining, workers * 2)}
+        while in_flight:
+            done, in_flight = wait(in_flight, return_when=FIRST_COMPLETED)
+            for future in done:
+                filename, pages, chunks = future.result()
+                if pages is None:
+                    print(f"Processed: {filename}")
+                else:
+                    print(f"Processed: {filename} (pages {pages.start + 1}-{pages.stop})")
+                chunk_count += len(chunks)
+                yield from zip(chunks, itertools.repeat(filename))
                 
-                chunks = splitter.split_text(content)
-                # Convert to Document-like objects
-                from langchain.schema import Document
-                for chunk in chunks:
-                    all_docs.append(Document(page_content=chunk, metadata={"source": filename}))
-    
-    print(f"Loaded {len(all_docs)} chunks from {len([f for f in os.listdir(folder_path) if f.endswith(('.pdf', '.txt', '.doc', '.docx'))])} files")
-    return all_docs
+                next_task = next(remaining, None)
+                if next_task is not None:
+                    in_flight.add(executor.submit(process_file, *next_task))
+    
+    print(f"Loaded {chunk_count} chunks from {len(filenames)} files")
 
-def preprocess_content(content):
-    """Clean and normalize document content for better processing"""
-    # Remove excessive whitespace
-    content = re.sub(r'\s+', ' ', content)
+_ADD_SLICE = 100_000
+
+def build_index(embeddings):
+    """Build an inner-product HNSW or IVF index over L2-normalized embeddings, training on them if needed"""
+    count, dim = embeddings.shape
+    sq8 = faiss.ScalarQuantizer.QT_8bit
+    
+    if count < Config.IVF_MIN_VECTORS:
+        # HNSW graph: sub-linear search without a training step
+        if Config.QUANTIZE_INDEX:
+            index = faiss.IndexHNSWSQ(dim, sq8, Config.HNSW_M, faiss.METRIC_INNER_PRODUCT)
+        else:
+            index = faiss.IndexHNSWFlat(dim, Config.HNSW_M, faiss.METRIC_INNER_PRODUCT)
+        index.hnsw.efConstruction = Config.HNSW_EF_CONSTRUCTION
+    else:
+        # Inverted file: cluster the vectors and only scan the closest lists
+        quantizer = faiss.IndexFlatIP(dim)
+        # count is the training sample, not the corpus; IVF_NLIST overrides it
+        nlist = Config.IVF_NLIST or int(4 * math.sqrt(count))
+        if Config.QUANTIZE_INDEX:
+            index = faiss.IndexIVFPQ(quantizer, dim, nlist, Config.PQ_M, 8, faiss.METRIC_INNER_PRODUCT)
+        else:
+            index = faiss.IndexIVFFlat(quantizer, dim, nlist, faiss.METRIC_INNER_PRODUCT)
     
-    # Replace unicode characters
-    content = content.replace('\u201c', '"').replace('\u201d', '"')
-    content = content.replace('\u2018', "'").replace('\u2019', "'")
-    content = content.replace('\u2013', '-').replace('\u2014', '--')
+    if not index.is_trained:
+        index.train(embeddings)
     
-    # Remove excessive punctuation
-    content = re.sub(r'[.!?]{2,}', '.', content)
+    # Add in slices so faiss grows its internal buffers in bounded steps
+    for start in range(0, count, _ADD_SLICE):
+        index.add(embeddings[start:start + _ADD_SLICE])
+    return index
+
+def batched(iterable, size):
+    """Yield lists of up to size items from any iterable"""
+    iterator = iter(iterable)
+    while batch := list(itertools.islice(iterator, size)):
+        yield batch
+
+def encode_texts(embedder, texts):
+    """Embed texts as a contiguous float32 matrix of unit-length rows"""
+    # MiniLM is small: larger batches keep a GPU busy, while on CPU they only add padding
+    batch_size = Config.EMBEDDING_BATCH_SIZE
+    if not batch_size:
+        batch_size = 256 if embedder.device.type == "cuda" else 64
     
-    # Remove page numbers and headers/footers (common patterns)
-    content = re.sub(r'\b(Page|page)\s+\d+\b', '', content)
-    content = re.sub(r'\b\d+\s+of\s+\d+\b', '', content)
+    # encode() already length-sorts each call internally, so batches carry little padding
+    embeddings = embedder.encode(
+        texts,
+        batch_size=batch_size,
+        convert_to_numpy=True,
+        show_progress_bar=False,
+        normalize_embeddings=False,
+    )
     
-    return content.strip()
+    # Unit-length vectors turn cosine similarity into a single dot product
+    embeddings = np.ascontiguousarray(embeddings, dtype=np.float32)
+    faiss.normalize_L2(embeddings)
+    return embeddings
 
-# Embed and save FAISS index
-def create_vector_store(chunks):
-    if not chunks:
-        print("❌ No chunks to process. Please upload some textbook files first.")
-        return
-        
-    texts = [doc.page_content for doc in chunks]
-    
-    # Filter out very short chunks that might not be useful
-    filtered_texts = []
-    filtered_chunks = []
-    for text, chunk in zip(texts, chunks):
-        if len(text.strip()) > Config.MIN_CHUNK_LENGTH:  # Only keep chunks with substantial content
-            filtered_texts.append(text)
-            filtered_chunks.append(chunk)
-    
-    if not filtered_texts:
-        print("❌ No substantial chunks found after filtering.")
-        return
+def open_embedding_cache(path):
+    """Open the on-disk chunk embedding cache, creating it on first use"""
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    cache = sqlite3.connect(path)
     
-    print(f"Using {len(filtered_texts)} substantial chunks for embedding...")
+    # Vectors are stored as float16, half the size of float32. The rounding
+    # error is far smaller than the int8 quantization the index applies anyway.
+    cache.execute("CREATE TABLE IF NOT EXISTS vectors (hash BLOB PRIMARY KEY, vec BLOB)")
     
-    embedder = SentenceTransformer("all-MiniLM-L6-v2")
-    print("Creating embeddings...")
-    embeddings = embedder.encode(filtered_texts, convert_to_tensor=False)
+    # Hashes looked up in this run, so entries for chunks no longer ingested can be pruned
+    cache.execute("CREATE TEMP TABLE seen (hash BLOB PRIMARY KEY)")
+    return cache
 
-    dim = embeddings[0].shape[0]
-    index = faiss.IndexFlatL2(dim)
-    index.add(embeddings)
+def prune_embedding_cache(cache):
+    """Drop cached vectors for chunks that the current run did not ingest"""
+    with cache:
+        removed = cache.execute("DELETE FROM vectors WHERE hash NOT IN (SELECT hash FROM temp.seen)").rowcount
+    if removed:
+        print(f"Pruned {removed} unused cached embeddings")
 
+def embed_texts(texts, cache=None):
+    """Embed texts, reusing vectors cached from earlier ingestion runs.
+    
+    Entries are keyed by a hash of the chunk text and the embedding backend,
+    so unchanged chunks are never re-encoded. The model is only loaded once
+    some text misses the cache.
+    """
+    # Imported on first use rather than at the top so parse workers, which
+    # re-import this script under the spawn start method, never load torch
+    from embedding import MODEL_TAG, load_embedder
+    
+    if cache is None:
+        return encode_texts(load_embedder(), texts)
+    
+    hashes = [hashlib.blake2b(f"{MODEL_TAG}\0{text}".encode("utf-8"), digest_size=16).digest() for text in texts]
+    cache.executemany("INSERT OR IGNORE INTO temp.seen VALUES (?)", ((key,) for key in hashes))
+    
+    placeholders = ",".join("?" * len(hashes))
+    rows = cache.execute(f"SELECT hash, vec FROM vectors WHERE hash IN ({placeholders})", hashes)
+    vectors = {key: np.frombuffer(vec, dtype=np.float16).astype(np.float32) for key, vec in rows}
+    
+    misses = [i for i, key in enumerate(hashes) if key not in vectors]
+    if misses:
+        embeddings = encode_texts(load_embedder(), [texts[i] for i in misses])
+        with cache:
+            cache.executemany(
+                "INSERT OR REPLACE INTO vectors VALUES (?, ?)",
+                [(hashes[i], embedding.astype(np.float16).tobytes()) for i, embedding in zip(misses, embeddings)],
+            )
+        vectors.update((hashes[i], embedding) for i, embedding in zip(misses, embeddings))
+    
+    return np.ascontiguousarray(np.stack([vectors[key] for key in hashes]))
+
+# Embed and save FAISS index
+def create_vector_store(chunks, output_dir="embeddings/faiss_index"):
+    """Embed (text, source) chunks in fixed-size batches and add them to the index as they arrive.
+    
+    Vectors are held back only until the index type is known: either the
+    corpus reaches IVF_MIN_VECTORS (the held vectors become the IVF
+    training sample) or the stream ends (an HNSW index takes them all).
+    
+    Chunk texts are streamed to texts.bin as concatenated UTF-8, with
+    offsets.npy holding the N+1 byte offsets, so the query side can read
+    any chunk directly without loading the rest. Per-chunk metadata is
+    stored column-wise in metadata.npz: a source_ids column indexing into
+    the source_names list of distinct file names. Nothing reads it yet; it
+    is kept so sources can be attached to answers without re-ingesting.
+    """
     # Create directories if they don't exist
-    os.makedirs("embeddings/faiss_index", exist_ok=True)
+    os.makedirs(output_dir, exist_ok=True)
+    texts_path = os.path.join(output_dir, "texts.bin")
+    
+    # The cache lives next to the index directory so clearing the index keeps it
+    cache = None
+    if Config.EMBEDDING_CACHE:
+        cache = open_embedding_cache(os.path.join(os.path.dirname(output_dir), "cache.sqlite"))
+    
+    print("Creating embeddings...")
+    index = None
+    pending = []
+    pending_count = 0
+    seen_count = 0
+    offsets = [0]
+    source_ids = []
+    source_names = {}
+    
+    # Write to a temporary file so a failed run leaves the previous store intact
+    with open(texts_path + ".tmp", "wb") as texts_file:
+        for batch in batched(chunks, Config.INGEST_BATCH_SIZE):
+            seen_count += len(batch)
+            
+            # Filter out very short chunks that might not be useful. The splitter
+            # already strips each chunk, so no per-chunk strip() copy is needed
+            batch = [(text, source) for text, source in batch if len(text) > Config.MIN_CHUNK_LENGTH]
+            if not batch:
+                continue
+            
+            embeddings = embed_texts([text for text, _ in batch], cache)
+            for text, source in batch:
+                offsets.append(offsets[-1] + texts_file.write(text.encode("utf-8")))
+                source_ids.append(source_names.setdefault(source, len(source_names)))
+            
+            if index is not None:
+                index.add(embeddings)
+                continue
+            
+            pending.append(embeddings)
+            pending_count += len(embeddings)
+            # The IVF training sample is simply the first chunks to arrive, so
+            # it leans towards the first few files; sampling the whole stream
+            # would mean holding every vector until the end
+            if pending_count >= Config.IVF_MIN_VECTORS:
+                index = build_index(np.concatenate(pending))
+                pending = []
+    
+    chunk_count = len(offsets) - 1
+    if not chunk_count:
+        os.remove(texts_path + ".tmp")
+        if not seen_count:
+            print("❌ No chunks to process. Please upload some textbook files first.")
+        else:
+            print("❌ No substantial chunks found after filtering.")
+        return
+    
+    if index is None:
+        index = build_index(np.concatenate(pending))
+    
+    # Save index and chunks. Every file is written to a temporary name and
+    # renamed over the old one, so a process that has the previous store
+    # memory-mapped keeps reading intact files instead of truncated ones.
+    offsets_path = os.path.join(output_dir, "offsets.npy")
+    metadata_path = os.path.join(output_dir, "metadata.npz")
+    index_path = os.path.join(output_dir, "index.faiss")
+    
+    with open(offsets_path + ".tmp", "wb") as f:
+        np.save(f, np.asarray(offsets, dtype=np.int64))
+    with open(metadata_path + ".tmp", "wb") as f:
+        np.savez(
+            f,
+            source_ids=np.asarray(source_ids, dtype=np.int32),
+            source_names=np.asarray(list(source_names), dtype=str),
+        )
+    faiss.write_index(index, index_path + ".tmp")
+    
+    # index.faiss goes last: its mtime marks a complete store
+    for path in (texts_path, offsets_path, metadata_path, index_path):
+        os.replace(path + ".tmp", path)
     
-    # Save index and chunks
-    faiss.write_index(index, "embeddings/faiss_index/index.faiss")
-    with open("embeddings/faiss_index/chunks.pkl", "wb") as f:
-        pickle.dump(filtered_chunks, f)
+    # Only after a complete store is saved, so a failed run keeps every vector
+    if cache is not None:
+        prune_embedding_cache(cache)
     
-    print(f"✅ FAISS index created and saved with {len(filtered_chunks)} chunks.")
+    print(f"✅ FAISS index created and saved with {chunk_count} chunks.")
 
 if __name__ == "__main__":
     print("🚀 Starting textbook ingestion...")
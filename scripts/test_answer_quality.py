@@ -1,12 +1,12 @@
 #!/usr/bin/env python3
 
 import sys
-import json
 from pathlib import Path
 
 # Add the project root to the path
 sys.path.append(str(Path(__file__).parent.parent))
-from scripts.answer_question import main as answer_question_main
+from config import Config
+from scripts.answer_question import answer_question_batch
 
 def test_answer_quality():
     """Test the answer quality improvements"""
@@ -23,55 +23,33 @@ def test_answer_quality():
     print("🧪 Testing answer quality improvements...")
     print("=" * 50)
     
-    for i, question in enumerate(test_questions, 1):
+    # Judge freshly generated answers, not ones cached by an earlier run
+    Config.ANSWER_CACHE = False
+    
+    # Embed and search all questions as one batch
+    results = answer_question_batch(test_questions)
+    
+    for i, (question, result) in enumerate(zip(test_questions, results), 1):
         print(f"\n📝 Test {i}: {question}")
         print("-" * 30)
         
-        try:
-            # Temporarily modify sys.argv to simulate command line call
-            original_argv = sys.argv.copy()
-            sys.argv = ['test_script', question]
-            
-            # Capture stdout to get the JSON response
-            import io
-            import contextlib
-            
-            with io.StringIO() as buf:
-                with contextlib.redirect_stdout(buf):
-                    answer_question_main()
-                output = buf.getvalue()
-            
-            # Parse the JSON response
-            try:
-                result = json.loads(output.strip())
-                if 'answer' in result:
-                    answer = result['answer']
-                    print(f"✅ Answer: {answer}")
-                    
-                    # Basic quality checks
-                    if len(answer) > 50:
-                        print("✅ Answer length: Good")
-                    else:
-                        print("⚠️  Answer length: Too short")
-                    
-                    if answer.endswith(('.', '!', '?')):
-                        print("✅ Answer formatting: Good")
-                    else:
-                        print("⚠️  Answer formatting: Missing proper ending")
-                        
-                elif 'error' in result:
-                    print(f"❌ Error: {result['error']}")
-                else:
-                    print(f"❌ Unexpected response format: {result}")
-                    
-            except json.JSONDecodeError:
-                print(f"❌ Failed to parse JSON response: {output}")
-                
-        except Exception as e:
-            print(f"❌ Test failed with exception: {e}")
-        finally:
-            # Restore original sys.argv
-            sys.argv = original_argv
+        if 'error' in result:
+            print(f"❌ Error: {result['error']}")
+            continue
+        
+        answer = result['answer']
+        print(f"✅ Answer: {answer}")
+        
+        # Basic quality checks
+        if len(answer) > 50:
+            print("✅ Answer length: Good")
+        else:
+            print("⚠️  Answer length: Too short")
+        
+        if answer.endswith(('.', '!', '?')):
+            print("✅ Answer formatting: Good")
+        else:
+            print("⚠️  Answer formatting: Missing proper ending")
     
     print("\n" + "=" * 50)
     print("✅ Answer quality testing completed!")